@@ -0,0 +1,176 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from qAuth.simulator import simulate
+
+"""
+    Module implementing amplified authentication.
+
+    A single round of zwdz or liBarnum is accepted by an impostor with some
+    probability, so the authenticator repeats the protocol. An Amplifier runs
+    the rounds concurrently instead of one after another, accepts only if
+    every round passes and stops waiting as soon as one round fails. Rounds
+    that have not started by then are cancelled; rounds already running are
+    left to finish. A round that raises counts as failed.
+
+    The worker pools are kept for the life of the Amplifier, so use it as a
+    context manager or call close() when done:
+
+    with Amplifier(8) as amplifier:
+        accepted = amplifier.simulate("zwdz", key)
+"""
+
+def _verdict(result):
+    if isinstance(result, tuple):
+        return result[0]
+    return result
+
+
+class Amplifier:
+
+    """
+        Class that runs independent authentication rounds concurrently.
+    """
+
+    def __init__(self, rounds, workers=None):
+
+        """
+            Creates an Amplifier for a number of rounds, running at most
+            workers of them at a time (one per round by default)
+        """
+
+        self.rounds = rounds
+        self.workers = workers
+        self.processes = None
+        self.threads = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+
+        """
+        Method that shuts down the worker pools without waiting for
+        rounds that are still running.
+        """
+
+        for pool in (self.processes, self.threads):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self.processes = None
+        self.threads = None
+
+    def processPool(self):
+        if self.processes is None:
+            self.processes = ProcessPoolExecutor(self.workers or min(self.rounds, os.cpu_count() or 1))
+        return self.processes
+
+    def threadPool(self):
+        if self.threads is None:
+            self.threads = ThreadPoolExecutor(self.workers or self.rounds)
+        return self.threads
+
+    def simulate(self, protocol, key=None, proverKey=None, timeout=10, noise=None, threshold=0):
+
+        """
+        Method that runs the rounds as full sessions on the local
+        simulator, spread over the process pool. With fewer workers than
+        rounds, the rounds queued behind a failed one never start.
+
+        :param protocol: One of "zwdz", "pingPong" or "liBarnum".
+        :type protocol: str
+        :param key: Secret Key held by the authenticator.
+        :type key: str
+        :param proverKey: Secret Key held by the prover, defaults to key.
+            A different key simulates an impostor.
+        :type proverKey: str
+        :param timeout: Seconds a node waits for a qubit or message.
+        :type timeout: float
+        :param noise: Noise channels of the local network.
+        :type noise: list of channel Objects
+        :param threshold: Number of errors each round tolerates.
+        :type threshold: int
+
+        :return: Result of amplified authentication check.
+        :rtype: Boolean
+        """
+
+        calls = [(simulate, (protocol, key, proverKey, timeout, None, noise, threshold)) for i in range(self.rounds)]
+        return self.allPass(self.processPool(), calls)
+
+    def authenticate(self, authenticators, *args):
+
+        """
+        Method that runs one authenticator per round over parallel
+        connections. The rounds of one node would share its qubit and
+        classical channels, so every authenticator must be bound to its own
+        node, paired with a prover node running the matching round.
+
+        A failed round only cancels the rounds that have not started. CQC
+        receives have no timeout, so a running round whose prover never
+        sends keeps its worker thread blocked, and the interpreter waits
+        for that thread at exit.
+
+        :param authenticators: One Authenticator per round.
+        :type authenticators: list of Authenticator Objects
+        :param args: Arguments of Authenticator.authenticate.
+
+        :return: Result of amplified authentication check.
+        :rtype: Boolean
+        """
+
+        if len(authenticators) != self.rounds:
+            raise ValueError("expected {} authenticators, got {}".format(self.rounds, len(authenticators)))
+        calls = [(authenticator.authenticate, args) for authenticator in authenticators]
+        return self.allPass(self.threadPool(), calls)
+
+    def prove(self, provers, *args):
+
+        """
+        Method that runs one prover per round over parallel connections,
+        the counterpart of authenticate.
+
+        :param provers: One Prover per round.
+        :type provers: list of Prover Objects
+        :param args: Arguments of Prover.authenticate.
+        """
+
+        if len(provers) != self.rounds:
+            raise ValueError("expected {} provers, got {}".format(self.rounds, len(provers)))
+        executor = self.threadPool()
+        for future in [executor.submit(prover.authenticate, *args) for prover in provers]:
+            future.result()
+
+    def allPass(self, executor, calls):
+
+        """
+        Method that submits the rounds to executor and collects their
+        verdicts. A round that raises counts as failed. On the first
+        failed round the rounds that have not started are cancelled and
+        the running ones are left to finish without being waited for.
+
+        :param executor: Executor the rounds run on.
+        :type executor: Executor Object
+        :param calls: (function, args) pair for each round.
+        :type calls: list of Tuple
+
+        :return: True if every round passed.
+        :rtype: Boolean
+        """
+
+        pending = set(executor.submit(function, *args) for function, args in calls)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    passed = _verdict(future.result())
+                except Exception:
+                    passed = False
+                if not passed:
+                    for future in pending:
+                        future.cancel()
+                    return False
+        return True
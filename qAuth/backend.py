@@ -0,0 +1,62 @@
+import random
+
+"""
+    Module defining the backend used by the protocol participants.
+
+    A backend hands out connections and qubits for a node and is the single
+    source of randomness for a participant. The default backend talks to a
+    running SimulaQron server through CQC; qAuth.simulator provides a local
+    in-process alternative.
+"""
+
+class CQCBackend:
+
+    """
+        Backend using the CQC interface of a running SimulaQron server.
+    """
+
+    def connect(self, name):
+
+        """
+        Method that opens a connection for a node.
+
+        :param name: Name of the node.
+        :type name: str
+
+        :return: Connection to the node.
+        :rtype: CQCConnection Object
+        """
+
+        from cqc.pythonLib import CQCConnection
+        return CQCConnection(name)
+
+    def qubit(self, connection):
+
+        """
+        Method that creates a fresh qubit on a connection.
+
+        :param connection: Connection created by this backend.
+        :type connection: CQCConnection Object
+
+        :return: Qubit in state |0>.
+        :rtype: Qubit Object
+        """
+
+        from cqc.pythonLib import qubit
+        return qubit(connection)
+
+    def randint(self, a, b):
+
+        """
+        Method that draws a random integer N such that a <= N <= b.
+
+        :param a: Lower bound.
+        :type a: int
+        :param b: Upper bound.
+        :type b: int
+
+        :return: Random integer.
+        :rtype: int
+        """
+
+        return random.randint(a, b)
@@ -1,4 +1,4 @@
-from cqc.pythonLib import CQCConnection, qubit
+from qAuth.backend import CQCBackend
 
 """
     Module implementing Li-Barnum QIA with entangled particles
@@ -45,13 +45,15 @@ class Prover(Participant):
         Class for Prover
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None):
 
         """
-            Creates a Prover by providing a name
+            Creates a Prover by providing a name and optionally
+            a backend (CQCBackend by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
         self.idToken = []
         self.auxPairs = []
         self.number_tokens = 4
@@ -65,16 +67,16 @@ class Prover(Participant):
         :type receiver: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
 
             for i in range(self.number_tokens):
 
                 # Create and distribute ID Tokens 
-                self.idToken.append(self.createEnt(qubit(User), qubit(User), 2))
+                self.idToken.append(self.createEnt(self.backend.qubit(User), self.backend.qubit(User), 2))
                 User.sendQubit(self.idToken[i][1], receiver)
 
                 # Create and store Aux Pairs
-                self.auxPairs.append(self.createEnt(qubit(User), qubit(User), 2))
+                self.auxPairs.append(self.createEnt(self.backend.qubit(User), self.backend.qubit(User), 2))
 
             # Apply CNOT Operation
             self.cnotS()
@@ -100,13 +102,17 @@ class Authenticator(Participant):
         Class for Authenticator
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None, threshold=0):
 
         """
-            Creates a Authenticator by providing a name
+            Creates a Authenticator by providing a name and optionally
+            a backend (CQCBackend by default) and the number of errors
+            tolerated before rejecting (0 by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
+        self.threshold = threshold
         self.idToken = []
         self.number_tokens = 4
         self.auxPairs = [] 
@@ -120,7 +126,7 @@ class Authenticator(Participant):
         :rtype: Boolean
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
 
             # Receive ID Token
             for i in range(self.number_tokens):
@@ -139,14 +145,13 @@ class Authenticator(Participant):
             result = self.bellMeasure()
 
             #Check Authentication result
-            flag = 0
+            errors = 0
             for i in result:
                 if i != [0,0]:
-                    flag = 1
-                    break
+                    errors = errors + 1
         
         #Return Authentication result
-        return flag == 0
+        return errors <= self.threshold
             
 
     def cnotR(self):
@@ -0,0 +1,386 @@
+import argparse
+import contextlib
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from qAuth.noise import BitFlip, Depolarizing, PhaseFlip
+from qAuth.simulator import simulate
+
+"""
+    Module implementing a load generator for the local simulator.
+
+    Sessions arrive as a Poisson process at a configurable rate, each one
+    picking a prover from a fixed population (so repeat peers occur) and a
+    protocol from a mix. Latency is measured from the scheduled arrival to
+    the verdict, so it includes time spent queueing for a worker. Sessions
+    that find the backlog full, or wait longer than the timeout for a
+    worker, count as timeouts. Statistics are kept in counters and bounded
+    latency reservoirs, so a long soak run with a duration shows the memory
+    growth of the simulated deployment rather than of the generator.
+
+    python -m qAuth.load --protocol zwdz --rate 200 --sessions 5000
+    python -m qAuth.load --rate 500 --duration 3600 --noise depolarizing:0.02 --threshold 1
+"""
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+NOISE = {"depolarizing": Depolarizing, "bitflip": BitFlip, "phaseflip": PhaseFlip}
+
+
+def _rss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def percentile(values, q):
+
+    """
+    Function that returns the nearest-rank percentile of values.
+
+    :param values: Sorted values.
+    :type values: list of float
+    :param q: Percentile between 0 and 100.
+    :type q: float
+
+    :return: Percentile, None for no values.
+    :rtype: float
+    """
+
+    if not values:
+        return None
+    return values[max(0, min(len(values) - 1, int(math.ceil(q / 100 * len(values))) - 1))]
+
+
+class Stats:
+
+    """
+        Class counting the outcomes of sessions, the errors by exception
+        type, and keeping a uniform reservoir sample of their latencies.
+    """
+
+    def __init__(self, reservoir=10000, seed=None):
+
+        """
+            Creates empty Stats keeping at most reservoir latencies
+        """
+
+        self.counts = dict((outcome, 0) for outcome in (ACCEPTED, REJECTED, TIMEOUT, ERROR))
+        self.errors = {}
+        self.latencies = []
+        self.completed = 0
+        self.reservoir = reservoir
+        self.rng = random.Random(seed)
+
+    def add(self, outcome, latency=None, error=None):
+
+        """
+        Method that records one session.
+
+        :param outcome: One of ACCEPTED, REJECTED, TIMEOUT or ERROR.
+        :type outcome: str
+        :param latency: Seconds from arrival to verdict, for completed sessions.
+        :type latency: float
+        :param error: Exception type name, for failed sessions.
+        :type error: str
+        """
+
+        self.counts[outcome] += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        if latency is not None:
+            self.completed += 1
+            if len(self.latencies) < self.reservoir:
+                self.latencies.append(latency)
+            else:
+                i = self.rng.randrange(self.completed)
+                if i < self.reservoir:
+                    self.latencies[i] = latency
+
+
+class Report:
+
+    """
+        Class holding the statistics of a run per protocol and the
+        memory samples taken during it.
+    """
+
+    def __init__(self, stats, elapsed, memory):
+
+        """
+            Creates a Report from Stats per protocol (None for all
+            protocols), the wall time of the run and (time, bytes)
+            memory samples
+        """
+
+        self.stats = stats
+        self.elapsed = elapsed
+        self.memory = memory
+
+    def summary(self, protocol=None):
+
+        """
+        Method that summarises the sessions of one protocol, or of all.
+
+        :param protocol: Protocol to summarise.
+        :type protocol: str
+
+        :return: Counts per outcome, errors per exception type, throughput,
+            rates and latency percentiles.
+        :rtype: dict
+        """
+
+        stats = self.stats.get(protocol) or Stats()
+        counts = stats.counts
+        total = sum(counts.values())
+        latencies = sorted(stats.latencies)
+
+        summary = {"sessions": total}
+        summary.update(counts)
+        summary["errors"] = dict(stats.errors)
+        summary["throughput"] = (counts[ACCEPTED] + counts[REJECTED]) / self.elapsed if self.elapsed else 0.0
+        summary["error_rate"] = counts[ERROR] / total if total else 0.0
+        summary["timeout_rate"] = counts[TIMEOUT] / total if total else 0.0
+        for q in (50, 95, 99):
+            summary["p{}".format(q)] = percentile(latencies, q)
+        return summary
+
+    def memoryGrowth(self):
+
+        """
+        Method that returns the change in resident memory over the run.
+
+        :return: Bytes gained since the first sample, None if unavailable.
+        :rtype: int
+        """
+
+        samples = [m for t, m in self.memory if m is not None]
+        if len(samples) < 2:
+            return None
+        return samples[-1] - samples[0]
+
+    def __str__(self):
+        lines = []
+        protocols = sorted(p for p in self.stats if p is not None)
+        for protocol in [None] + (protocols if len(protocols) > 1 else []):
+            s = self.summary(protocol)
+            lines.append("{:<9} sessions {} accepted {} rejected {} timeouts {} errors {}".format(
+                protocol or "all", s["sessions"], s[ACCEPTED], s[REJECTED], s[TIMEOUT], s[ERROR]))
+            latency = " ".join("p{} {}".format(q, "-" if s["p{}".format(q)] is None
+                                               else "{:.1f}ms".format(s["p{}".format(q)] * 1000))
+                               for q in (50, 95, 99))
+            lines.append("{:<9} {:.1f} auth/s  error rate {:.2%}  timeout rate {:.2%}  {}".format(
+                "", s["throughput"], s["error_rate"], s["timeout_rate"], latency))
+            if s["errors"]:
+                lines.append("{:<9} {}".format("", "  ".join(
+                    "{} {}".format(name, count) for name, count in sorted(s["errors"].items()))))
+        growth = self.memoryGrowth()
+        if growth is not None:
+            samples = [m for t, m in self.memory if m is not None]
+            lines.append("memory    {:.1f} MiB -> {:.1f} MiB ({:+.1f} MiB)".format(
+                samples[0] / 2**20, samples[-1] / 2**20, growth / 2**20))
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+
+    """
+        Class that drives simulated provers against the local simulator.
+    """
+
+    def __init__(self, protocols, rate, keyLength=24, provers=1000, workers=64,
+                 timeout=5, noise=None, threshold=0, seed=None, backlog=None, quiet=True):
+
+        """
+            Creates a LoadGenerator for a list of protocols at rate
+            sessions per second, with a population of provers each
+            holding a key of keyLength bits. At most workers sessions run
+            at once and at most backlog more (workers by default) wait.
+            With quiet, stdout is discarded during run, since
+            zwdz.Authenticator prints every hash value; this applies to
+            the whole process while run is active
+        """
+
+        self.protocols = protocols
+        self.rate = rate
+        self.workers = workers
+        self.backlog = workers if backlog is None else backlog
+        self.timeout = timeout
+        self.noise = noise
+        self.threshold = threshold
+        self.rng = random.Random(seed)
+        self.keys = [format(self.rng.getrandbits(keyLength), "0{}b".format(keyLength))
+                     for i in range(provers)]
+        self.quiet = quiet
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.slots = None
+
+    def record(self, protocol, outcome, latency=None, error=None):
+        with self.lock:
+            self.stats[None].add(outcome, latency, error)
+            self.stats[protocol].add(outcome, latency, error)
+
+    def session(self, protocol, key, arrival):
+
+        """
+        Method that runs one session and records its outcome and latency.
+        A session that waited longer than the timeout for a worker is
+        counted as a timeout without running.
+
+        :param protocol: Protocol of the session.
+        :type protocol: str
+        :param key: Secret Key of the prover.
+        :type key: str
+        :param arrival: Scheduled arrival time (time.perf_counter).
+        :type arrival: float
+        """
+
+        try:
+            if time.perf_counter() - arrival > self.timeout:
+                self.record(protocol, TIMEOUT)
+                return
+            try:
+                accepted = simulate(protocol, key, timeout=self.timeout, noise=self.noise,
+                                    threshold=self.threshold)
+            except TimeoutError:
+                self.record(protocol, TIMEOUT)
+                return
+            except Exception as exc:
+                self.record(protocol, ERROR, error=type(exc).__name__)
+                return
+            self.record(protocol, ACCEPTED if accepted else REJECTED, time.perf_counter() - arrival)
+        finally:
+            self.slots.release()
+
+    def run(self, sessions=None, duration=None, sampleInterval=1.0):
+
+        """
+        Method that generates load until sessions have arrived or duration
+        seconds of wall time have passed, then waits for the sessions in
+        flight. Arrivals that find workers plus backlog sessions in flight
+        are counted as timeouts.
+
+        :param sessions: Number of sessions to start.
+        :type sessions: int
+        :param duration: Seconds to keep starting sessions.
+        :type duration: float
+        :param sampleInterval: Seconds between memory samples.
+        :type sampleInterval: float
+
+        :return: Report of the run.
+        :rtype: Report Object
+        """
+
+        if sessions is None and duration is None:
+            raise ValueError("either sessions or duration is required")
+
+        self.stats = dict((name, Stats(seed=self.rng.getrandbits(32)))
+                          for name in [None] + sorted(set(self.protocols)))
+        self.slots = threading.Semaphore(self.workers + self.backlog)
+        memory = [(0.0, _rss())]
+        start = time.perf_counter()
+        deadline = None if duration is None else start + duration
+
+        with contextlib.ExitStack() as stack:
+            if self.quiet:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            self.generate(sessions, deadline, sampleInterval, start, memory)
+
+        elapsed = time.perf_counter() - start
+        memory.append((elapsed, _rss()))
+        return Report(self.stats, elapsed, memory)
+
+    def generate(self, sessions, deadline, sampleInterval, start, memory):
+
+        """
+        Method that runs the arrival loop of run and waits for the
+        sessions in flight.
+        """
+
+        arrival = start
+        started = 0
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            while sessions is None or started < sessions:
+                arrival += self.rng.expovariate(self.rate)
+                if deadline is not None and arrival > deadline:
+                    break
+                now = time.perf_counter()
+                if arrival > now:
+                    time.sleep(arrival - now)
+                    now = arrival
+                if deadline is not None and now > deadline:
+                    break
+                if now - start - memory[-1][0] >= sampleInterval:
+                    memory.append((now - start, _rss()))
+                protocol = self.rng.choice(self.protocols)
+                started += 1
+                if not self.slots.acquire(False):
+                    self.record(protocol, TIMEOUT)
+                    continue
+                executor.submit(self.session, protocol, self.rng.choice(self.keys), arrival)
+
+
+def parseNoise(spec):
+
+    """
+    Function that parses a noise channel given as kind:probability.
+
+    :param spec: For example "depolarizing:0.01".
+    :type spec: str
+
+    :return: Noise channel.
+    :rtype: channel Object
+    """
+
+    kind, sep, p = spec.partition(":")
+    if kind not in NOISE or not sep:
+        raise argparse.ArgumentTypeError("expected one of {} followed by :probability".format(", ".join(sorted(NOISE))))
+    try:
+        return NOISE[kind](float(p))
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid probability {}".format(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for qAuth authenticators on the local simulator.")
+    parser.add_argument("--protocol", action="append", choices=["zwdz", "pingPong", "liBarnum"],
+                        help="protocol to run, repeat for a mix (default zwdz)")
+    parser.add_argument("--rate", type=float, default=100, help="session arrivals per second")
+    parser.add_argument("--sessions", type=int, help="number of sessions to start")
+    parser.add_argument("--duration", type=float, help="seconds to generate load for (soak test)")
+    parser.add_argument("--key-length", type=int, default=24)
+    parser.add_argument("--provers", type=int, default=1000, help="number of distinct provers")
+    parser.add_argument("--workers", type=int, default=64, help="sessions run concurrently")
+    parser.add_argument("--backlog", type=int, help="sessions waiting for a worker (default --workers)")
+    parser.add_argument("--timeout", type=float, default=5, help="seconds a node waits for a qubit or message")
+    parser.add_argument("--noise", action="append", type=parseNoise,
+                        help="channel noise as kind:probability, kind one of {}, repeatable".format(
+                            ", ".join(sorted(NOISE))))
+    parser.add_argument("--threshold", type=int, default=0, help="errors tolerated by the authenticators")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.sessions is None and args.duration is None:
+        parser.error("one of --sessions or --duration is required")
+
+    generator = LoadGenerator(args.protocol or ["zwdz"], args.rate, args.key_length, args.provers,
+                              args.workers, args.timeout, args.noise, args.threshold, args.seed,
+                              args.backlog)
+
+    print(generator.run(args.sessions, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import random
+
+from qAuth.simulator import simulate
+
+"""
+    Module implementing noise channels for the local simulator.
+
+    A channel is passed to LocalNetwork (or simulate) and acts on every
+    qubit sent between nodes. Each channel draws a Pauli error as the pair
+    (x, z) of bits, so that X = (1, 0), Z = (0, 1) and Y = (1, 1).
+"""
+
+class BitFlip:
+
+    """
+        Channel applying X with probability p
+    """
+
+    def __init__(self, p):
+        self.p = p
+
+    def sample(self, rng):
+        return (1, 0) if rng.random() < self.p else (0, 0)
+
+
+class PhaseFlip:
+
+    """
+        Channel applying Z with probability p
+    """
+
+    def __init__(self, p):
+        self.p = p
+
+    def sample(self, rng):
+        return (0, 1) if rng.random() < self.p else (0, 0)
+
+
+class Depolarizing:
+
+    """
+        Channel applying X, Y or Z, each with probability p/3
+    """
+
+    def __init__(self, p):
+        self.p = p
+
+    def sample(self, rng):
+        if rng.random() >= self.p:
+            return (0, 0)
+        return [(1, 0), (1, 1), (0, 1)][rng.randrange(3)]
+
+
+def estimateRates(protocol, trials, noise=None, threshold=0, keyLength=24, seed=None):
+
+    """
+    Function that estimates the false reject and false accept rates of
+    a protocol on the local simulator. Honest sessions share a random key,
+    impostor sessions give the prover an independent random key. liBarnum
+    has no shared key in this library, so its false accept rate is None.
+
+    :param protocol: One of "zwdz", "pingPong" or "liBarnum".
+    :type protocol: str
+    :param trials: Number of honest and of impostor sessions.
+    :type trials: int
+    :param noise: Noise channels of the local network.
+    :type noise: list of channel Objects
+    :param threshold: Number of errors the authenticator tolerates.
+    :type threshold: int
+    :param keyLength: Length of the random keys.
+    :type keyLength: int
+    :param seed: Seed for keys and networks.
+    :type seed: int
+
+    :return: False reject rate and false accept rate.
+    :rtype: Tuple
+    """
+
+    rng = random.Random(seed)
+
+    def randomKey():
+        return format(rng.getrandbits(keyLength), "0{}b".format(keyLength))
+
+    rejects = 0
+    for i in range(trials):
+        key = randomKey()
+        if not simulate(protocol, key, seed=rng.getrandbits(32), noise=noise, threshold=threshold):
+            rejects = rejects + 1
+
+    if protocol == "liBarnum":
+        return (rejects / trials, None)
+
+    accepts = 0
+    for i in range(trials):
+        key = randomKey()
+        proverKey = randomKey()
+        while proverKey == key:
+            proverKey = randomKey()
+        if simulate(protocol, key, proverKey, seed=rng.getrandbits(32), noise=noise, threshold=threshold):
+            accepts = accepts + 1
+
+    return (rejects / trials, accepts / trials)
@@ -1,5 +1,5 @@
-from cqc.pythonLib import CQCConnection, qubit
-import random
+from qAuth.backend import CQCBackend
+from functools import lru_cache
 
 """
     Module implementing Ping Pong without Entanglement Protocol
@@ -7,6 +7,29 @@ import random
     Quantum information processing 13.11 (2014): 2535-2549.
 """
 
+KEY_CACHE_SIZE = 256
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def keySchedule(key):
+
+    """
+    Function that parses the key pair by pair. Schedules of the most
+    recently used keys are cached, so repeat peers skip the parsing.
+
+    The cache holds shared keys in memory for the life of the process.
+    Call keySchedule.cache_clear() when keys are rotated or revoked.
+
+    :param key: Secret Key Shared by two parties.
+    :type key: str
+
+    :return: (basis, flip) for each qubit, where basis is the second bit
+        of the pair and flip the parity of the pair.
+    :rtype: Tuple of Tuples
+    """
+
+    return tuple((int(key[i]), int(key[i-1]) ^ int(key[i])) for i in range(1, len(key), 2))
+
+
 class Participant:
 
     """
@@ -27,19 +50,16 @@ class Participant:
         :type receiver: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             self.randomChoice = []
-            for i in range(1, len(key), 2):
-                q=qubit(User)
-                r = random.randint(0,1)
+            for basis, flip in keySchedule(key):
+                q=self.backend.qubit(User)
+                r = self.backend.randint(0,1)
                 self.randomChoice.append(r)
-                if(key[i] == '0'):
-                    if(r):
-                        q.X()
-                else:
-                    if(r):
-                        q.X()
-                    q.H()                    
+                if(r):
+                    q.X()
+                if(basis):
+                    q.H()
                 User.sendQubit(q, receiver)
     
     def encodeQubits(self, qubit_list, key):
@@ -54,10 +74,10 @@ class Participant:
         :type key: str
         """
 
-        for i in range(0, len(key)-1, 2):
-            if(key[i] != key[i+1]):
-                qubit_list[int(i/2)].X()
-                qubit_list[int(i/2)].Z()
+        for i, (basis, flip) in enumerate(keySchedule(key)):
+            if(flip):
+                qubit_list[i].X()
+                qubit_list[i].Z()
     
     def update_key(self, qubit_list, key):
 
@@ -74,15 +94,14 @@ class Participant:
         """
 
         k_temp = ["*"]*int(len(key))
-        for i in range(1, len(key), 2):
-            if(key[i] == '1'):
-                qubit_list[int((i-1)/2)].H()
-            q_result = qubit_list[int((i-1)/2)].measure()
+        for i, (basis, flip) in enumerate(keySchedule(key)):
+            if(basis):
+                qubit_list[i].H()
+            q_result = qubit_list[i].measure()
 
-            k_temp[i] = str(q_result)
-            k_temp[i-1] = str(int(key[i-1])^int(key[i])^int(k_temp[i]))
-            k_prime = ''.join(k_temp)
-        return k_prime
+            k_temp[2*i + 1] = str(q_result)
+            k_temp[2*i] = str(flip^q_result)
+        return ''.join(k_temp)
 
 
 class Authenticator(Participant):
@@ -91,13 +110,17 @@ class Authenticator(Participant):
         Class for Authenticator
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None, threshold=0):
 
         """
-            Creates a Authenticator by providing a name
+            Creates a Authenticator by providing a name and optionally
+            a backend (CQCBackend by default) and the number of errors
+            tolerated before rejecting (0 by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
+        self.threshold = threshold
 
     def authenticate(self, key, receiver):
 
@@ -116,7 +139,8 @@ class Authenticator(Participant):
         self.prepareSequence(key, receiver)
         self.recvEncoded(key)
         check_kprime = self.checkAuth(key)
-        return (check_kprime == self.k_prime, self.k_prime)
+        errors = sum(1 for i in range(1, len(key), 2) if check_kprime[i] != self.k_prime[i])
+        return (errors <= self.threshold, self.k_prime)
     
     def recvEncoded(self, key):
 
@@ -127,9 +151,9 @@ class Authenticator(Participant):
         :type key: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             incoming_qubits = []
-            for i in range(int(len(key)/2)):
+            for i in range(len(keySchedule(key))):
                 incoming_qubits.append(User.recvQubit())
             self.k_prime = self.update_key(incoming_qubits, key)
     
@@ -144,18 +168,14 @@ class Authenticator(Participant):
         :rtype: String
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             qubit_list = []
-            for i in range(1, len(key), 2):
-                q=qubit(User)
-                r = self.randomChoice[int((i-1)/2)]
-                if(key[i] == '0'):
-                    if(r):
-                        q.X()
-                else:
-                    if(r):
-                        q.X()
-                    q.H()                    
+            for i, (basis, flip) in enumerate(keySchedule(key)):
+                q=self.backend.qubit(User)
+                if(self.randomChoice[i]):
+                    q.X()
+                if(basis):
+                    q.H()
                 qubit_list.append(q)
             
             self.encodeQubits(qubit_list, key)
@@ -168,13 +188,15 @@ class Prover(Participant):
         Class for Prover
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None):
 
         """
-            Creates a Prover by providing a name
+            Creates a Prover by providing a name and optionally
+            a backend (CQCBackend by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
     
     def authenticate(self, key, sender):
 
@@ -205,10 +227,10 @@ class Prover(Participant):
         :type name: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
 
             incoming_qubits = []
-            for i in range(int(len(key)/2)):
+            for i in range(len(keySchedule(key))):
                 incoming_qubits.append(User.recvQubit())
             
             self.encodeQubits(incoming_qubits, key)
@@ -227,22 +249,23 @@ class Prover(Participant):
         :type receiver: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
 
-            for i in range(1, len(key), 2):
-                q = qubit(User)
+            for i, (basis, flip) in enumerate(keySchedule(key)):
+                q = self.backend.qubit(User)
+                measured = self.k_prime[2*i + 1]
                 
-                if self.k_prime[i] == '1' and key[i] == '0':
+                if measured == '1' and not basis:
                     q.X()
                     q.Z()
                 
-                if self.k_prime[i] == '0' and key[i] == '1':
+                if measured == '0' and basis:
                     q.X()
                     q.H()
                     q.X()
                     q.Z()
                 
-                if self.k_prime[i] == '1' and key[i] == '1':
+                if measured == '1' and basis:
                     q.X()
                     q.H()
 
@@ -1,4 +1,5 @@
-from cqc.pythonLib import CQCConnection, qubit
+from qAuth.backend import CQCBackend
+from functools import lru_cache
 import hashlib
 
 """
@@ -8,6 +9,35 @@ import hashlib
     Quantum Information Processing 18.1 (2019): 7.
 """
 
+KEY_CACHE_SIZE = 256
+MIDSTATE_MIN_LENGTH = 128
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def keyMidstate(key):
+
+    """
+    Function that returns a SHA-256 object which has already absorbed
+    the key. Midstates of the most recently used keys are cached, so it
+    must be copied before use and never updated in place.
+
+    SHA-256 only absorbs full 64 byte blocks, and copying costs about as
+    much as hashing one block, so createHash only uses the midstate for
+    keys of at least MIDSTATE_MIN_LENGTH bytes and hashes shorter keys
+    from scratch.
+
+    The cache holds shared keys in memory for the life of the process.
+    Call keyMidstate.cache_clear() when keys are rotated or revoked.
+
+    :param key: Secret Key Shared by two parties.
+    :type key: str
+
+    :return: SHA-256 object of the key.
+    :rtype: hashlib.sha256 Object
+    """
+
+    return hashlib.sha256(key.encode('utf-8'))
+
+
 class Participants:
 
     """
@@ -31,23 +61,22 @@ class Participants:
         
         """
 
-        final_key = key + random_key
-        hashcode = hashlib.sha256((final_key).encode('utf-8')).hexdigest()
-        hash_binary = ""
-
-        for i in hashcode:
-            binary = format(int(i, 16), '04b')
-            hash_binary = hash_binary + binary
+        if len(key) >= MIDSTATE_MIN_LENGTH:
+            digest = keyMidstate(key).copy()
+            digest.update(random_key.encode('utf-8'))
+        else:
+            digest = hashlib.sha256((key + random_key).encode('utf-8'))
+        hash_binary = format(int(digest.hexdigest(), 16), '0256b')
 
         
-            """In ideal settings, we can use the whole 256 bits of hash_binary for the authentication process.
-            Here however, we use just a subset of 10 bits from the whole 256 bits. The value of starting index
-            in the hash_binary for the subset_hash  is the decimal form of biary number produced by concatinating 
-            the first 4 bits of key and last 4 bit of random_key.
-
-            That is, if the first 4 bits of key is 1010 and the last 4 bits of random_key is 0101, the binary rep
-            of concatenaion operation = 10100101 and corresponsing decimal value is 165. Therefore, subset_hash is
-            hash_binary[165:174]"""
+        """In ideal settings, we can use the whole 256 bits of hash_binary for the authentication process.
+        Here however, we use just a subset of 10 bits from the whole 256 bits. The value of starting index
+        in the hash_binary for the subset_hash  is the decimal form of biary number produced by concatinating 
+        the first 4 bits of key and last 4 bit of random_key.
+
+        That is, if the first 4 bits of key is 1010 and the last 4 bits of random_key is 0101, the binary rep
+        of concatenaion operation = 10100101 and corresponsing decimal value is 165. Therefore, subset_hash is
+        hash_binary[165:174]"""
         
 
         concat = key[0:4] + random_key[-4:]
@@ -64,13 +93,15 @@ class Prover(Participants):
         Class for Prover
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None):
 
         """
-            Creates a Prover by providing a name
+            Creates a Prover by providing a name and optionally
+            a backend (CQCBackend by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
     
     def authenticate(self, key, receiver):
 
@@ -100,9 +131,9 @@ class Prover(Participants):
         """
         
         random_key = ''
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             for i in range(24):
-                q = qubit(User)
+                q = self.backend.qubit(User)
                 q.H()
                 random_key = random_key + str(q.measure())
         return random_key
@@ -134,7 +165,7 @@ class Prover(Participants):
         for i in range(len(message)):
             message[i] = int(message[i], 2)
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             User.sendClassical(receiver, message)
     
     def encodeSend(self, hash_value, receiver):
@@ -148,9 +179,9 @@ class Prover(Participants):
         :type receiver: str
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             for i in range(int(len(hash_value)/2)):
-                qA = qubit(User)
+                qA = self.backend.qubit(User)
                 if hash_value[2*i + 1] == "1":
                     qA.X()
                 if hash_value[2*i] == "1":
@@ -164,13 +195,17 @@ class Authenticator(Participants):
         Class for Authenticator
     """
 
-    def __init__(self, name):
+    def __init__(self, name, backend=None, threshold=0):
 
         """
-            Creates a Authenticator by providing a name
+            Creates a Authenticator by providing a name and optionally
+            a backend (CQCBackend by default) and the number of errors
+            tolerated before rejecting (0 by default)
         """
 
         self.name = name
+        self.backend = backend if backend is not None else CQCBackend()
+        self.threshold = threshold
 
     def authenticate(self, key):
 
@@ -199,7 +234,7 @@ class Authenticator(Participants):
         :rtype: String
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             data = User.recvClassical()
             message = list(data)
             random_key = ""
@@ -220,7 +255,7 @@ class Authenticator(Participants):
         :rtype: Boolean
         """
 
-        with CQCConnection(self.name) as User:
+        with self.backend.connect(self.name) as User:
             incoming_qubits = []
             decode = ""
             for i in range(int(len(hash_value)/2)):
@@ -232,4 +267,5 @@ class Authenticator(Participants):
                     incoming_qubits[i].H()
                 decode = decode + str(incoming_qubits[i].measure())
 
-        return decode == hash_value           
+        errors = sum(1 for a, b in zip(decode, hash_value) if a != b)
+        return errors <= self.threshold           
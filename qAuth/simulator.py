@@ -0,0 +1,516 @@
+import queue
+import random
+import threading
+
+"""
+    Module implementing a local in-process backend.
+
+    All protocols in qAuth only use Clifford gates (X, Y, Z, H, S, CNOT, CZ)
+    and computational basis measurements, so the quantum state of a whole
+    network is simulated exactly with a stabilizer tableau.
+
+    Channel noise is simulated with Pauli frames: the tableau always holds
+    the noiseless state, and each noisy qubit carries the Pauli error it has
+    picked up, propagated through the gates applied to it. A measurement
+    reports the noiseless outcome flipped by the X part of the frame, which
+    is exact for Pauli noise on Clifford circuits.
+
+    Aaronson, Scott, and Daniel Gottesman. "Improved simulation of stabilizer circuits."
+    Physical Review A 70.5 (2004): 052328.
+"""
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+def _product(x1, z1, r1, x2, z2, r2):
+
+    """
+    Multiplies Pauli row (x1, z1, r1) into row (x2, z2, r2) and
+    returns the resulting row.
+    """
+
+    plus = (x1 & z1 & z2 & ~x2) | (x1 & ~z1 & z2 & x2) | (~x1 & z1 & x2 & ~z2)
+    minus = (x1 & z1 & x2 & ~z2) | (x1 & ~z1 & z2 & ~x2) | (~x1 & z1 & x2 & z2)
+    phase = 2*r1 + 2*r2 + _popcount(plus) - _popcount(minus)
+    return (x1 ^ x2, z1 ^ z2, 1 if phase % 4 == 2 else 0)
+
+
+class Tableau:
+
+    """
+        Stabilizer tableau over a growable set of qubits.
+        Rows 0..n-1 are destabilizers and rows n..2n-1 stabilizers,
+        each stored as bitmasks over the qubit indices.
+    """
+
+    def __init__(self, rng):
+
+        """
+            Creates an empty tableau drawing outcomes from rng
+        """
+
+        self.rng = rng
+        self.n = 0
+        self.x = []
+        self.z = []
+        self.r = []
+
+    def allocate(self):
+
+        """
+        Method that adds a qubit in state |0>.
+
+        :return: Index of the new qubit.
+        :rtype: int
+        """
+
+        a = self.n
+        bit = 1 << a
+        self.x.insert(a, bit)
+        self.z.insert(a, 0)
+        self.r.insert(a, 0)
+        self.x.append(0)
+        self.z.append(bit)
+        self.r.append(0)
+        self.n += 1
+        return a
+
+    def X(self, a):
+        for i in range(2*self.n):
+            self.r[i] ^= (self.z[i] >> a) & 1
+
+    def Z(self, a):
+        for i in range(2*self.n):
+            self.r[i] ^= (self.x[i] >> a) & 1
+
+    def Y(self, a):
+        for i in range(2*self.n):
+            self.r[i] ^= ((self.x[i] ^ self.z[i]) >> a) & 1
+
+    def H(self, a):
+        bit = 1 << a
+        for i in range(2*self.n):
+            x = self.x[i] & bit
+            z = self.z[i] & bit
+            if x and z:
+                self.r[i] ^= 1
+            elif x or z:
+                self.x[i] ^= bit
+                self.z[i] ^= bit
+
+    def S(self, a):
+        bit = 1 << a
+        for i in range(2*self.n):
+            x = self.x[i] & bit
+            if x:
+                if self.z[i] & bit:
+                    self.r[i] ^= 1
+                self.z[i] ^= bit
+
+    def cnot(self, a, b):
+        for i in range(2*self.n):
+            xa = (self.x[i] >> a) & 1
+            zb = (self.z[i] >> b) & 1
+            if xa and zb and not (((self.x[i] >> b) ^ (self.z[i] >> a)) & 1):
+                self.r[i] ^= 1
+            self.x[i] ^= xa << b
+            self.z[i] ^= zb << a
+
+    def cphase(self, a, b):
+        self.H(b)
+        self.cnot(a, b)
+        self.H(b)
+
+    def measure(self, a, forced=None):
+
+        """
+        Method that measures a qubit in the computational basis.
+
+        :param a: Index of the qubit.
+        :type a: int
+        :param forced: Outcome to select when the outcome is random.
+        :type forced: int
+
+        :return: Measurement outcome.
+        :rtype: int
+        """
+
+        n = self.n
+        bit = 1 << a
+        p = None
+        for i in range(n, 2*n):
+            if self.x[i] & bit:
+                p = i
+                break
+
+        if p is not None:
+            outcome = self.rng.getrandbits(1) if forced is None else forced
+            for i in range(2*n):
+                if i != p and self.x[i] & bit:
+                    self.x[i], self.z[i], self.r[i] = _product(self.x[p], self.z[p], self.r[p],
+                                                               self.x[i], self.z[i], self.r[i])
+            self.x[p-n], self.z[p-n], self.r[p-n] = self.x[p], self.z[p], self.r[p]
+            self.x[p], self.z[p], self.r[p] = 0, bit, outcome
+            return outcome
+
+        x = z = r = 0
+        for i in range(n):
+            if self.x[i] & bit:
+                x, z, r = _product(self.x[i+n], self.z[i+n], self.r[i+n], x, z, r)
+        if forced is not None and forced != r:
+            raise ValueError("outcome {} of qubit {} is impossible".format(forced, a))
+        return r
+
+
+class LocalNetwork:
+
+    """
+        Class holding the shared quantum state and the qubit and
+        classical channels of all nodes of a local network.
+    """
+
+    def __init__(self, timeout=None, seed=None, noise=None):
+
+        """
+            Creates a network. Receives give up after timeout seconds,
+            seed makes measurement outcomes and random draws reproducible
+            and noise is a list of channels from qAuth.noise applied to
+            every qubit sent between nodes.
+        """
+
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.tableau = Tableau(self.rng)
+        self.lock = threading.Lock()
+        self.free = []
+        self.qubits = {}
+        self.classical = {}
+        self.noise = noise or []
+        self.frames = {}
+
+    def channel(self, channels, name):
+        with self.lock:
+            if name not in channels:
+                channels[name] = queue.Queue()
+            return channels[name]
+
+    def allocate(self):
+        with self.lock:
+            if self.free:
+                return self.free.pop()
+            return self.tableau.allocate()
+
+    def mixed(self):
+
+        """
+        Method that creates a qubit in the maximally mixed state by
+        entangling it with an ancilla that is never touched again.
+
+        :return: Index of the qubit.
+        :rtype: int
+        """
+
+        a = self.allocate()
+        b = self.allocate()
+        with self.lock:
+            self.tableau.H(a)
+            self.tableau.cnot(a, b)
+        return b
+
+    def apply(self, gate, *indices):
+        with self.lock:
+            getattr(self.tableau, gate)(*indices)
+            if self.frames:
+                self.propagate(gate, *indices)
+
+    def propagate(self, gate, a, b=None):
+
+        """
+        Method that moves the Pauli frames of the qubits a gate acts on
+        past that gate.
+        """
+
+        xa, za = self.frames.get(a, (0, 0))
+        if gate == "H":
+            xa, za = za, xa
+        elif gate == "S":
+            za ^= xa
+        elif gate in ("cnot", "cphase"):
+            xb, zb = self.frames.get(b, (0, 0))
+            if gate == "cnot":
+                xb ^= xa
+                za ^= zb
+            else:
+                za ^= xb
+                zb ^= xa
+            self.setFrame(b, xb, zb)
+        self.setFrame(a, xa, za)
+
+    def setFrame(self, index, x, z):
+        if x or z:
+            self.frames[index] = (x, z)
+        else:
+            self.frames.pop(index, None)
+
+    def transmit(self, index):
+
+        """
+        Method that passes a qubit through the noise channels.
+
+        :param index: Index of the qubit.
+        :type index: int
+        """
+
+        with self.lock:
+            x, z = self.frames.get(index, (0, 0))
+            for channel in self.noise:
+                ex, ez = channel.sample(self.rng)
+                x ^= ex
+                z ^= ez
+            self.setFrame(index, x, z)
+
+    def measure(self, index, release=True, forced=None):
+        with self.lock:
+            flip, _ = self.frames.pop(index, (0, 0))
+            if forced is not None:
+                forced ^= flip
+            outcome = self.tableau.measure(index, forced)
+            if release:
+                if outcome:
+                    self.tableau.X(index)
+                self.free.append(index)
+            elif flip:
+                self.frames[index] = (flip, 0)
+            return outcome ^ flip
+
+    def receive(self, channels, name):
+        try:
+            return self.channel(channels, name).get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("{} received nothing within {} seconds".format(name, self.timeout))
+
+
+class LocalQubit:
+
+    """
+        Qubit living in a LocalNetwork, mirroring the CQC qubit interface
+    """
+
+    def __init__(self, connection, index=None):
+
+        """
+            Creates a qubit in state |0> for a connection, or wraps
+            an existing index of the network
+        """
+
+        self.network = connection.network
+        self.index = self.network.allocate() if index is None else index
+        self.active = True
+
+    def X(self):
+        self.network.apply("X", self.index)
+
+    def Y(self):
+        self.network.apply("Y", self.index)
+
+    def Z(self):
+        self.network.apply("Z", self.index)
+
+    def H(self):
+        self.network.apply("H", self.index)
+
+    def S(self):
+        self.network.apply("S", self.index)
+
+    def cnot(self, target):
+        self.network.apply("cnot", self.index, target.index)
+
+    def cphase(self, target):
+        self.network.apply("cphase", self.index, target.index)
+
+    def measure(self, inplace=False, forced=None):
+
+        """
+        Method that measures the qubit in the computational basis.
+
+        :param inplace: Keep the qubit alive after measurement.
+        :type inplace: bool
+        :param forced: Outcome to select when the outcome is random.
+        :type forced: int
+
+        :return: Measurement outcome.
+        :rtype: int
+        """
+
+        self.active = inplace
+        return self.network.measure(self.index, release=not inplace, forced=forced)
+
+
+class LocalConnection:
+
+    """
+        Connection of a node to a LocalNetwork, mirroring CQCConnection
+    """
+
+    def __init__(self, network, name):
+
+        """
+            Creates a connection for the node name
+        """
+
+        self.network = network
+        self.name = name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    def sendQubit(self, q, name):
+        q.active = False
+        if self.network.noise:
+            self.network.transmit(q.index)
+        self.network.channel(self.network.qubits, name).put(q.index)
+
+    def recvQubit(self):
+        return LocalQubit(self, self.network.receive(self.network.qubits, self.name))
+
+    def sendClassical(self, name, msg):
+        data = bytes([msg]) if isinstance(msg, int) else bytes(msg)
+        self.network.channel(self.network.classical, name).put(data)
+
+    def recvClassical(self):
+        return self.network.receive(self.network.classical, self.name)
+
+
+class LocalBackend:
+
+    """
+        Backend running all nodes inside a LocalNetwork of this process.
+    """
+
+    def __init__(self, network=None):
+
+        """
+            Creates a backend for network, or for a fresh network
+        """
+
+        self.network = network if network is not None else LocalNetwork()
+
+    def connect(self, name):
+
+        """
+        Method that opens a connection for a node.
+
+        :param name: Name of the node.
+        :type name: str
+
+        :return: Connection to the node.
+        :rtype: LocalConnection Object
+        """
+
+        return LocalConnection(self.network, name)
+
+    def qubit(self, connection):
+
+        """
+        Method that creates a fresh qubit on a connection.
+
+        :param connection: Connection created by this backend.
+        :type connection: LocalConnection Object
+
+        :return: Qubit in state |0>.
+        :rtype: LocalQubit Object
+        """
+
+        return LocalQubit(connection)
+
+    def randint(self, a, b):
+
+        """
+        Method that draws a random integer N such that a <= N <= b.
+
+        :param a: Lower bound.
+        :type a: int
+        :param b: Upper bound.
+        :type b: int
+
+        :return: Random integer.
+        :rtype: int
+        """
+
+        return self.network.rng.randint(a, b)
+
+
+def simulate(protocol, key=None, proverKey=None, timeout=10, seed=None, noise=None, threshold=0):
+
+    """
+    Function that runs one full session of a protocol on a fresh
+    LocalNetwork, with the prover in a background thread.
+
+    :param protocol: One of "zwdz", "pingPong" or "liBarnum".
+    :type protocol: str
+    :param key: Secret Key held by the authenticator.
+    :type key: str
+    :param proverKey: Secret Key held by the prover, defaults to key.
+    :type proverKey: str
+    :param timeout: Seconds a node waits for a qubit or message.
+    :type timeout: float
+    :param seed: Seed of the local network.
+    :type seed: int
+    :param noise: Noise channels of the local network.
+    :type noise: list of channel Objects
+    :param threshold: Number of errors the authenticator tolerates.
+    :type threshold: int
+
+    :return: Result of authentication check. An exception raised by the
+        prover is re-raised here, in preference to the authenticator's
+        resulting TimeoutError.
+    :rtype: Boolean
+    """
+
+    from qAuth.ent import liBarnum
+    from qAuth.nonEnt import pingPong, zwdz
+
+    backend = LocalBackend(LocalNetwork(timeout=timeout, seed=seed, noise=noise))
+    if proverKey is None:
+        proverKey = key
+
+    if protocol == "zwdz":
+        prover = lambda: zwdz.Prover("Alice", backend).authenticate(proverKey, "Bob")
+        authenticate = lambda: zwdz.Authenticator("Bob", backend, threshold).authenticate(key)
+    elif protocol == "pingPong":
+        prover = lambda: pingPong.Prover("Bob", backend).authenticate(proverKey, "Alice")
+        authenticate = lambda: pingPong.Authenticator("Alice", backend, threshold).authenticate(key, "Bob")[0]
+    elif protocol == "liBarnum":
+        prover = lambda: liBarnum.Prover("Alice", backend).authenticate("Bob")
+        authenticate = lambda: liBarnum.Authenticator("Bob", backend, threshold).authenticate()
+    else:
+        raise ValueError("unknown protocol {}".format(protocol))
+
+    failures = []
+
+    def run():
+        try:
+            prover()
+        except Exception as exc:
+            failures.append(exc)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        result = authenticate()
+    except TimeoutError:
+        thread.join(timeout)
+        if failures:
+            raise failures[0]
+        raise
+    thread.join(timeout)
+    if failures:
+        raise failures[0]
+    return result
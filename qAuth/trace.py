@@ -0,0 +1,547 @@
+import importlib
+import json
+import struct
+import threading
+
+from qAuth.simulator import LocalBackend, LocalNetwork, LocalQubit
+
+"""
+    Module implementing session trace recording and deterministic replay.
+
+    A Recorder runs a participant with its backend wrapped so that every
+    qubit operation, measurement outcome, random draw and message of the
+    session is appended to a compact binary trace file. Replaying a session
+    re-runs the same participant against a LocalBackend, feeding it the
+    recorded random draws, measurement outcomes and incoming messages and
+    checking that it performs exactly the recorded operations.
+
+    Each session in the file is laid out as MAGIC, a length prefixed JSON
+    header and a length prefixed event stream. Traces hold the arguments of
+    authenticate, including the shared key, and must be stored accordingly.
+"""
+
+MAGIC = b"QAT1"
+
+NEW = 0
+GATE = 1
+CNOT = 2
+CPHASE = 3
+MEASURE = 4
+SEND_QUBIT = 5
+RECV_QUBIT = 6
+SEND_CLASSICAL = 7
+RECV_CLASSICAL = 8
+RANDINT = 9
+
+GATES = "XYZHS"
+
+PROTOCOLS = ("qAuth.nonEnt.zwdz", "qAuth.nonEnt.pingPong", "qAuth.ent.liBarnum")
+ROLES = ("Prover", "Authenticator")
+
+_EVENTS = {
+    NEW: struct.Struct("<H"),
+    GATE: struct.Struct("<HB"),
+    CNOT: struct.Struct("<HH"),
+    CPHASE: struct.Struct("<HH"),
+    MEASURE: struct.Struct("<HB"),
+    SEND_QUBIT: struct.Struct("<HB"),
+    RECV_QUBIT: struct.Struct("<H"),
+    SEND_CLASSICAL: struct.Struct("<BH"),
+    RECV_CLASSICAL: struct.Struct("<H"),
+    RANDINT: struct.Struct("<iii"),
+}
+
+_LENGTH = struct.Struct("<I")
+
+
+class ReplayError(Exception):
+
+    """
+        Raised when a replayed session diverges from its trace.
+    """
+
+
+class TraceExhausted(ReplayError):
+
+    """
+        Raised when a replayed session needs more events than were recorded.
+    """
+
+
+class Session:
+
+    """
+        Class for one recorded session of a single participant.
+    """
+
+    def __init__(self, protocol, role, name, args, peers, events, result=None, error=None, options=None):
+
+        """
+            Creates a Session from its header fields and event stream
+        """
+
+        self.protocol = protocol
+        self.role = role
+        self.name = name
+        self.args = args
+        self.peers = peers
+        self.events = events
+        self.result = result
+        self.error = error
+        self.options = options or {}
+
+    def encode(self):
+
+        """
+        Method that serializes the session.
+
+        :return: Binary session record.
+        :rtype: bytes
+        """
+
+        header = json.dumps({"protocol": self.protocol, "role": self.role, "name": self.name,
+                             "args": self.args, "peers": self.peers, "result": self.result,
+                             "error": self.error, "options": self.options}, separators=(",", ":")).encode("utf-8")
+        return MAGIC + _LENGTH.pack(len(header)) + header + _LENGTH.pack(len(self.events)) + self.events
+
+
+def _normalise(value):
+    return json.loads(json.dumps(value))
+
+
+def _options(participant):
+    if hasattr(participant, "threshold"):
+        return {"threshold": participant.threshold}
+    return {}
+
+
+class _Log:
+
+    """
+        Common bookkeeping of the event writer and reader.
+    """
+
+    def __init__(self, peers):
+        self.peers = peers
+        self.qubits = 0
+
+    def newQubit(self):
+        ident = self.qubits
+        self.qubits += 1
+        return ident
+
+
+class _Writer(_Log):
+
+    """
+        Appends the events of a live session to a buffer.
+    """
+
+    def __init__(self):
+        _Log.__init__(self, [])
+        self.buffer = bytearray()
+
+    def peer(self, name):
+        if name not in self.peers:
+            self.peers.append(name)
+        return self.peers.index(name)
+
+    def event(self, op, *values, data=b""):
+        self.buffer.append(op)
+        self.buffer += _EVENTS[op].pack(*values)
+        self.buffer += data
+
+    def measure(self, q, inplace):
+        outcome = q.qubit.measure(inplace=inplace)
+        self.event(MEASURE, q.ident, outcome)
+        return outcome
+
+    def recvQubit(self, connection):
+        q = connection.connection.recvQubit()
+        ident = self.newQubit()
+        self.event(RECV_QUBIT, ident)
+        return _Qubit(q, self, ident)
+
+    def recvClassical(self, connection):
+        data = bytes(connection.connection.recvClassical())
+        self.event(RECV_CLASSICAL, len(data), data=data)
+        return data
+
+    def randint(self, backend, a, b):
+        value = backend.randint(a, b)
+        self.event(RANDINT, a, b, value)
+        return value
+
+
+class _Reader(_Log):
+
+    """
+        Checks the events of a replayed session against a trace and
+        supplies the recorded nondeterministic values.
+    """
+
+    def __init__(self, session):
+        _Log.__init__(self, session.peers)
+        self.events = session.events
+        self.offset = 0
+
+    def peer(self, name):
+        if name not in self.peers:
+            raise ReplayError("{} was never contacted in the recorded session".format(name))
+        return self.peers.index(name)
+
+    def event(self, op, *values, data=None):
+        if self.offset >= len(self.events):
+            raise TraceExhausted("trace ended at byte {}".format(self.offset))
+        code = self.events[self.offset]
+        if code not in _EVENTS:
+            raise ReplayError("unknown event {} at byte {}".format(code, self.offset))
+        layout = _EVENTS[code]
+        recorded = layout.unpack_from(self.events, self.offset + 1)
+        self.offset += 1 + layout.size
+        payload = b""
+        if code in (SEND_CLASSICAL, RECV_CLASSICAL):
+            payload = bytes(self.events[self.offset : self.offset + recorded[-1]])
+            self.offset += recorded[-1]
+        if code != op or recorded[:len(values)] != values or (data is not None and payload != data):
+            raise ReplayError("expected event {} {} but replay produced {} {}".format(
+                code, recorded, op, values))
+        return recorded[len(values):], payload
+
+    def measure(self, q, inplace):
+        (outcome,), _ = self.event(MEASURE, q.ident)
+        try:
+            return q.qubit.measure(inplace=inplace, forced=outcome)
+        except ValueError as error:
+            raise ReplayError(str(error))
+
+    def recvQubit(self, connection):
+        ident = self.newQubit()
+        self.event(RECV_QUBIT, ident)
+        return _Qubit(connection.connection.recvMixed(), self, ident)
+
+    def recvClassical(self, connection):
+        _, data = self.event(RECV_CLASSICAL)
+        return data
+
+    def randint(self, backend, a, b):
+        (value,), _ = self.event(RANDINT, a, b)
+        return value
+
+
+class _Qubit:
+
+    """
+        Qubit wrapper logging every operation.
+    """
+
+    def __init__(self, qubit, log, ident):
+        self.qubit = qubit
+        self.log = log
+        self.ident = ident
+
+    def gate(self, name):
+        self.log.event(GATE, self.ident, GATES.index(name))
+        getattr(self.qubit, name)()
+
+    def X(self):
+        self.gate("X")
+
+    def Y(self):
+        self.gate("Y")
+
+    def Z(self):
+        self.gate("Z")
+
+    def H(self):
+        self.gate("H")
+
+    def S(self):
+        self.gate("S")
+
+    def cnot(self, target):
+        self.log.event(CNOT, self.ident, target.ident)
+        self.qubit.cnot(target.qubit)
+
+    def cphase(self, target):
+        self.log.event(CPHASE, self.ident, target.ident)
+        self.qubit.cphase(target.qubit)
+
+    def measure(self, inplace=False):
+        return self.log.measure(self, inplace)
+
+
+class _Connection:
+
+    """
+        Connection wrapper logging every message.
+    """
+
+    def __init__(self, connection, log):
+        self.connection = connection
+        self.log = log
+
+    def __enter__(self):
+        self.connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.connection.__exit__(exc_type, exc_value, traceback)
+
+    def sendQubit(self, q, name):
+        self.log.event(SEND_QUBIT, q.ident, self.log.peer(name))
+        self.connection.sendQubit(q.qubit, name)
+
+    def recvQubit(self):
+        return self.log.recvQubit(self)
+
+    def sendClassical(self, name, msg):
+        data = bytes([msg]) if isinstance(msg, int) else bytes(msg)
+        self.log.event(SEND_CLASSICAL, self.log.peer(name), len(data), data=data)
+        self.connection.sendClassical(name, msg)
+
+    def recvClassical(self):
+        return self.log.recvClassical(self)
+
+
+class _Backend:
+
+    """
+        Backend wrapper logging a session through log.
+    """
+
+    def __init__(self, backend, log):
+        self.backend = backend
+        self.log = log
+
+    def connect(self, name):
+        return _Connection(self.backend.connect(name), self.log)
+
+    def qubit(self, connection):
+        q = self.backend.qubit(connection.connection)
+        ident = self.log.newQubit()
+        self.log.event(NEW, ident)
+        return _Qubit(q, self.log, ident)
+
+    def randint(self, a, b):
+        return self.log.randint(self.backend, a, b)
+
+
+class _ReplayConnection:
+
+    """
+        Local connection whose peers only exist in the trace. Sent
+        qubits and messages are dropped once checked against the trace.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.network = connection.network
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def sendQubit(self, q, name):
+        q.active = False
+
+    def recvMixed(self):
+
+        """
+        Method that stands in for a qubit from a peer. Its state is unknown
+        so it is replaced by a maximally mixed qubit, for which every
+        recorded outcome is possible.
+        """
+
+        return LocalQubit(self.connection, self.network.mixed())
+
+    def sendClassical(self, name, msg):
+        pass
+
+
+class _ReplayBackend(LocalBackend):
+
+    """
+        LocalBackend handing out connections with trace-only peers.
+    """
+
+    def connect(self, name):
+        return _ReplayConnection(LocalBackend.connect(self, name))
+
+    def qubit(self, connection):
+        return LocalBackend.qubit(self, connection.connection)
+
+
+class Recorder:
+
+    """
+        Class that records sessions of participants to a trace file.
+    """
+
+    def __init__(self, path):
+
+        """
+            Creates a Recorder appending to the trace file at path
+        """
+
+        self.path = path
+        self.lock = threading.Lock()
+
+    def run(self, participant, *args):
+
+        """
+        Method that runs participant.authenticate(*args) and appends
+        the recorded session to the trace file.
+
+        :param participant: Prover or Authenticator of any protocol.
+        :type participant: Participant Object
+
+        :return: Result of participant.authenticate.
+        :rtype: Same as participant.authenticate
+        """
+
+        log = _Writer()
+        backend = participant.backend
+        participant.backend = _Backend(backend, log)
+        result = None
+        error = None
+        try:
+            result = participant.authenticate(*args)
+            return result
+        except Exception as exc:
+            error = repr(exc)
+            raise
+        finally:
+            participant.backend = backend
+            session = Session(type(participant).__module__, type(participant).__name__,
+                              participant.name, _normalise(list(args)), log.peers,
+                              bytes(log.buffer), _normalise(result), error, _options(participant))
+            self.append(session)
+
+    def append(self, session):
+
+        """
+        Method that appends a session to the trace file.
+
+        :param session: Recorded session.
+        :type session: Session Object
+        """
+
+        record = session.encode()
+        with self.lock:
+            with open(self.path, "ab") as trace:
+                trace.write(record)
+
+
+def read(path):
+
+    """
+    Function that reads the sessions of a trace file. A truncated
+    session at the end of the file, left by an interrupted writer, is
+    ignored.
+
+    :param path: Path of the trace file.
+    :type path: str
+
+    :return: Generator of recorded sessions.
+    :rtype: Generator of Session Objects
+    """
+
+    with open(path, "rb") as trace:
+        data = trace.read()
+
+    offset = 0
+    while offset + len(MAGIC) + _LENGTH.size <= len(data):
+        if data[offset : offset + len(MAGIC)] != MAGIC:
+            raise ValueError("corrupt trace at byte {}".format(offset))
+        offset += len(MAGIC)
+        (size,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if offset + size + _LENGTH.size > len(data):
+            return
+        header = json.loads(data[offset : offset + size].decode("utf-8"))
+        offset += size
+        (size,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        if offset + size > len(data):
+            return
+        events = data[offset : offset + size]
+        offset += size
+        yield Session(header["protocol"], header["role"], header["name"], header["args"],
+                      header["peers"], events, header["result"], header["error"], header.get("options"))
+
+
+def replay(session, seed=None):
+
+    """
+    Function that deterministically re-runs a recorded session against
+    a LocalBackend.
+
+    :param session: Recorded session.
+    :type session: Session Object
+    :param seed: Seed of the local network.
+    :type seed: int
+
+    :return: Result of the replayed authenticate call, None for a
+        session that originally failed with an exception. Only the
+        roles of the PROTOCOLS modules are replayed. A recorded
+        failure is reproduced if the replay raises an exception with the
+        same repr, or runs out of events where the original stopped
+        waiting for a peer.
+    :rtype: Same as participant.authenticate
+    """
+
+    if session.protocol not in PROTOCOLS or session.role not in ROLES:
+        raise ReplayError("unknown protocol {}.{}".format(session.protocol, session.role))
+    role = getattr(importlib.import_module(session.protocol), session.role)
+
+    network = LocalNetwork(seed=seed)
+    log = _Reader(session)
+    participant = role(session.name, backend=_Backend(_ReplayBackend(network), log), **session.options)
+
+    try:
+        result = participant.authenticate(*session.args)
+    except Exception as exc:
+        if session.error is None:
+            if isinstance(exc, ReplayError):
+                raise
+            raise ReplayError("replay raised {!r}".format(exc))
+        if isinstance(exc, TraceExhausted) and log.offset == len(session.events):
+            return None
+        if repr(exc) == session.error:
+            return None
+        raise ReplayError("recorded session failed with {} but replay raised {!r}".format(session.error, exc))
+
+    if session.error is not None:
+        raise ReplayError("recorded session failed with {} but replay succeeded".format(session.error))
+    if log.offset != len(session.events):
+        raise ReplayError("replay stopped at byte {} of {}".format(log.offset, len(session.events)))
+    if _normalise(result) != session.result:
+        raise ReplayError("replay returned {} instead of {}".format(result, session.result))
+    return result
+
+
+def replayFile(path):
+
+    """
+    Function that replays every session of a trace file.
+
+    :param path: Path of the trace file.
+    :type path: str
+
+    :return: Number of sessions replayed and list of (index, exception)
+        for the sessions that diverged or could not be replayed.
+    :rtype: Tuple
+    """
+
+    count = 0
+    failures = []
+    for index, session in enumerate(read(path)):
+        count += 1
+        try:
+            replay(session)
+        except Exception as error:
+            failures.append((index, error))
+    return (count, failures)
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from qAuth.amplify import Amplifier
+from qAuth.nonEnt import zwdz
+from qAuth.simulator import LocalBackend, LocalNetwork
+
+KEY = "101010110001101110011001"
+OTHER = "010011100110001011100110"
+
+
+def test_simulated_rounds():
+    with Amplifier(4) as amplifier:
+        assert amplifier.simulate("zwdz", KEY)
+        pool = amplifier.processes
+        assert amplifier.simulate("liBarnum")
+        assert amplifier.processes is pool
+    assert amplifier.processes is None
+    with Amplifier(8) as amplifier:
+        assert not amplifier.simulate("zwdz", KEY, OTHER)
+
+
+def test_raising_round_fails():
+    with Amplifier(2) as amplifier:
+        assert not amplifier.simulate("zwdz", KEY, "1x1", timeout=0.2)
+
+
+def run(amplifier, proverKeys):
+    backends = [LocalBackend(LocalNetwork(timeout=5, seed=i)) for i in range(len(proverKeys))]
+    provers = [zwdz.Prover("Alice{}".format(i), backend) for i, backend in enumerate(backends)]
+    authenticators = [zwdz.Authenticator("Bob{}".format(i), backend) for i, backend in enumerate(backends)]
+    threads = [threading.Thread(target=prover.authenticate, args=(key, "Bob{}".format(i)))
+               for i, (prover, key) in enumerate(zip(provers, proverKeys))]
+    for thread in threads:
+        thread.start()
+    result = amplifier.authenticate(authenticators, KEY)
+    for thread in threads:
+        thread.join()
+    return result
+
+
+def test_parallel_connections():
+    with Amplifier(3) as amplifier:
+        assert run(amplifier, [KEY, KEY, KEY])
+        assert not run(amplifier, [KEY, OTHER, KEY])
+
+
+def test_failed_round_cancels_queued_rounds():
+    started = []
+    calls = [(lambda: False, ())] + [(started.append, (i,)) for i in range(3)]
+    with ThreadPoolExecutor(1) as executor:
+        assert not Amplifier(4).allPass(executor, calls)
+    assert len(started) < 3
@@ -0,0 +1,90 @@
+import hashlib
+import random
+
+from qAuth.nonEnt import pingPong, zwdz
+
+
+def baselineHash(key, random_key):
+    hashcode = hashlib.sha256((key + random_key).encode('utf-8')).hexdigest()
+    hash_binary = ""
+    for i in hashcode:
+        hash_binary = hash_binary + format(int(i, 16), '04b')
+    decimal_concat = int(key[0:4] + random_key[-4:], 2)
+    if decimal_concat < 246:
+        return hash_binary[decimal_concat : decimal_concat+10]
+    return hash_binary[-10:]
+
+
+class FakeQubit:
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.gates = []
+
+    def H(self):
+        self.gates.append("H")
+
+    def X(self):
+        self.gates.append("X")
+
+    def Z(self):
+        self.gates.append("Z")
+
+    def measure(self):
+        return self.outcome
+
+
+def baselineUpdate(qubit_list, key):
+    k_temp = ["*"]*int(len(key))
+    for i in range(1, len(key), 2):
+        if(key[i] == '1'):
+            qubit_list[int((i-1)/2)].H()
+        q_result = qubit_list[int((i-1)/2)].measure()
+        k_temp[i] = str(q_result)
+        k_temp[i-1] = str(int(key[i-1])^int(key[i])^int(k_temp[i]))
+    return ''.join(k_temp)
+
+
+def baselineEncode(qubit_list, key):
+    for i in range(0, len(key)-1, 2):
+        if(key[i] != key[i+1]):
+            qubit_list[int(i/2)].X()
+            qubit_list[int(i/2)].Z()
+
+
+def randomKey(rng, length):
+    return format(rng.getrandbits(length), "0{}b".format(length))
+
+
+def test_create_hash_matches_baseline():
+    rng = random.Random(1)
+    participant = zwdz.Participants()
+    for length in (8, 24, 127, 128, 300):
+        for i in range(50):
+            key = randomKey(rng, length)
+            random_key = randomKey(rng, 24)
+            assert participant.createHash(key, random_key) == baselineHash(key, random_key)
+
+
+def test_schedule_matches_baseline():
+    rng = random.Random(1)
+    participant = pingPong.Participant()
+    for length in (2, 9, 24, 31):
+        for i in range(50):
+            key = randomKey(rng, length)
+            outcomes = [rng.getrandbits(1) for j in range(length // 2)]
+            ours = [FakeQubit(m) for m in outcomes]
+            theirs = [FakeQubit(m) for m in outcomes]
+            participant.encodeQubits(ours, key)
+            baselineEncode(theirs, key)
+            assert participant.update_key(ours, key) == baselineUpdate(theirs, key)
+            assert [q.gates for q in ours] == [q.gates for q in theirs]
+
+
+def test_caches_can_be_cleared():
+    pingPong.keySchedule("0110")
+    zwdz.keyMidstate("0110")
+    pingPong.keySchedule.cache_clear()
+    zwdz.keyMidstate.cache_clear()
+    assert pingPong.keySchedule.cache_info().currsize == 0
+    assert zwdz.keyMidstate.cache_info().currsize == 0
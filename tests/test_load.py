@@ -0,0 +1,57 @@
+import time
+
+from qAuth.load import ACCEPTED, ERROR, TIMEOUT, LoadGenerator, Report, Stats, percentile
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_run_counts_every_session():
+    report = LoadGenerator(["zwdz", "liBarnum"], rate=500, provers=5, workers=4, seed=1).run(sessions=50)
+    summary = report.summary()
+    assert summary["sessions"] == 50
+    assert summary[ACCEPTED] + summary[TIMEOUT] == 50
+    assert summary["p50"] is not None
+    assert report.summary("zwdz")["sessions"] + report.summary("liBarnum")["sessions"] == 50
+    assert "all" in str(report)
+
+
+def test_duration_is_wall_clock_and_overflow_times_out():
+    start = time.perf_counter()
+    report = LoadGenerator(["zwdz"], rate=100000, workers=2, backlog=2, timeout=0.5, seed=1).run(duration=0.5)
+    assert time.perf_counter() - start < 3
+    assert report.summary()[TIMEOUT] > 0
+
+
+def test_errors_are_counted_by_type():
+    report = LoadGenerator(["unknown"], rate=1000, workers=2, seed=1).run(sessions=5)
+    summary = report.summary()
+    assert summary[ERROR] == 5
+    assert summary["errors"] == {"ValueError": 5}
+
+
+def test_reservoir_is_bounded():
+    stats = Stats(reservoir=10, seed=1)
+    for i in range(1000):
+        stats.add(ACCEPTED, i)
+    assert len(stats.latencies) == 10
+    assert stats.counts[ACCEPTED] == 1000
+
+
+def test_report_with_missing_memory_samples():
+    report = Report({}, 1.0, [(0.0, None), (0.5, 2**20), (1.0, 2 * 2**20)])
+    assert report.memoryGrowth() == 2**20
+    assert "memory" in str(report)
+
+
+def test_seed_makes_protocol_mix_reproducible(capsys):
+    counts = []
+    for i in range(3):
+        report = LoadGenerator(["zwdz", "pingPong", "liBarnum"], rate=2000, seed=1).run(sessions=300)
+        counts.append([report.summary(p)["sessions"] for p in ("zwdz", "pingPong", "liBarnum")])
+    assert counts[0] == counts[1] == counts[2]
+    assert capsys.readouterr().out == ""
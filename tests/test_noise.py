@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from qAuth.noise import BitFlip, Depolarizing, PhaseFlip, estimateRates
+from qAuth.simulator import LocalBackend, LocalNetwork, simulate
+
+
+def framed(frames, gate, *indices):
+    network = LocalNetwork(seed=1)
+    for i in range(2):
+        network.allocate()
+    network.frames = dict(frames)
+    network.apply(gate, *indices)
+    return network.frames
+
+
+def test_frame_propagation():
+    assert framed({0: (1, 0)}, "H", 0) == {0: (0, 1)}
+    assert framed({0: (0, 1)}, "H", 0) == {0: (1, 0)}
+    assert framed({0: (1, 0)}, "S", 0) == {0: (1, 1)}
+    assert framed({0: (0, 1)}, "S", 0) == {0: (0, 1)}
+    assert framed({0: (1, 0)}, "cnot", 0, 1) == {0: (1, 0), 1: (1, 0)}
+    assert framed({1: (0, 1)}, "cnot", 0, 1) == {0: (0, 1), 1: (0, 1)}
+    assert framed({0: (1, 0)}, "cphase", 0, 1) == {0: (1, 0), 1: (0, 1)}
+    assert framed({1: (1, 1)}, "cphase", 0, 1) == {0: (0, 1), 1: (1, 1)}
+    assert framed({0: (1, 1)}, "X", 0) == {0: (1, 1)}
+
+
+def transmit(noise, basis):
+    backend = LocalBackend(LocalNetwork(seed=1, noise=noise))
+    q = backend.qubit(backend.connect("Alice"))
+    if basis:
+        q.H()
+    backend.connect("Alice").sendQubit(q, "Bob")
+    q = backend.connect("Bob").recvQubit()
+    if basis:
+        q.H()
+    return q.measure()
+
+
+def test_channels_flip_outcomes():
+    assert transmit([BitFlip(1.0)], 0) == 1
+    assert transmit([BitFlip(1.0)], 1) == 0
+    assert transmit([PhaseFlip(1.0)], 0) == 0
+    assert transmit([PhaseFlip(1.0)], 1) == 1
+    assert transmit([BitFlip(1.0), PhaseFlip(1.0)], 1) == 1
+
+
+def test_depolarizing_samples_every_pauli():
+    rng = random.Random(1)
+    channel = Depolarizing(0.3)
+    samples = [channel.sample(rng) for i in range(3000)]
+    assert set(samples) == {(0, 0), (1, 0), (0, 1), (1, 1)}
+    assert 0.25 < 1 - samples.count((0, 0)) / len(samples) < 0.35
+
+
+@pytest.mark.parametrize("protocol,tolerance", [("zwdz", 5), ("pingPong", 12), ("liBarnum", 4)])
+def test_threshold_tolerates_every_error(protocol, tolerance):
+    key = "101010110001101110011001"
+    noise = [Depolarizing(0.5)]
+    assert not all(simulate(protocol, key, seed=seed, noise=noise) for seed in range(10))
+    assert all(simulate(protocol, key, seed=seed, noise=noise, threshold=tolerance) for seed in range(10))
+
+
+def test_estimate_rates():
+    assert estimateRates("zwdz", 20, seed=1)[0] == 0.0
+    assert estimateRates("pingPong", 20, seed=1) == (0.0, 0.0)
+    assert estimateRates("liBarnum", 20, [BitFlip(0.3)], seed=1)[1] is None
@@ -0,0 +1,74 @@
+import pytest
+
+from qAuth.simulator import LocalBackend, LocalNetwork, simulate
+
+KEY = "101010110001101110011001"
+OTHER = "010011100110001011100110"
+
+
+@pytest.mark.parametrize("protocol", ["zwdz", "pingPong", "liBarnum"])
+def test_honest_prover_is_accepted(protocol):
+    for seed in range(10):
+        assert simulate(protocol, KEY, seed=seed)
+
+
+@pytest.mark.parametrize("protocol", ["zwdz", "pingPong"])
+def test_impostor_is_rejected(protocol):
+    accepted = sum(1 for seed in range(20) if simulate(protocol, KEY, OTHER, seed=seed))
+    assert accepted <= 3
+
+
+def test_prover_error_surfaces():
+    with pytest.raises(ValueError):
+        simulate("zwdz", "101010110001101110011001", proverKey="1x1", timeout=0.2)
+
+
+def test_bell_pair_outcomes_agree():
+    backend = LocalBackend(LocalNetwork(seed=1))
+    connection = backend.connect("Alice")
+    outcomes = set()
+    for i in range(20):
+        a = backend.qubit(connection)
+        b = backend.qubit(connection)
+        a.H()
+        a.cnot(b)
+        m = a.measure()
+        assert b.measure() == m
+        outcomes.add(m)
+    assert outcomes == {0, 1}
+
+
+def test_gates_on_basis_states():
+    backend = LocalBackend(LocalNetwork(seed=1))
+    connection = backend.connect("Alice")
+    q = backend.qubit(connection)
+    q.X()
+    assert q.measure() == 1
+    q = backend.qubit(connection)
+    q.H()
+    q.S()
+    q.S()
+    q.H()
+    assert q.measure() == 1
+    q = backend.qubit(connection)
+    q.H()
+    q.Z()
+    q.H()
+    assert q.measure() == 1
+
+
+def test_forced_outcome():
+    network = LocalNetwork(seed=1)
+    connection = LocalBackend(network).connect("Alice")
+    q = LocalBackend(network).qubit(connection)
+    q.H()
+    assert q.measure(forced=1) == 1
+    q = LocalBackend(network).qubit(connection)
+    with pytest.raises(ValueError):
+        q.measure(forced=1)
+
+
+def test_receive_times_out():
+    connection = LocalBackend(LocalNetwork(timeout=0.01)).connect("Bob")
+    with pytest.raises(TimeoutError):
+        connection.recvQubit()
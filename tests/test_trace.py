@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from qAuth import trace
+from qAuth.ent import liBarnum
+from qAuth.nonEnt import pingPong, zwdz
+from qAuth.simulator import LocalBackend, LocalNetwork
+
+KEY = "001001000100100111101110"
+
+
+def record(recorder, prover, proverArgs, authenticator, authenticatorArgs):
+    thread = threading.Thread(target=recorder.run, args=(prover,) + proverArgs)
+    thread.start()
+    result = recorder.run(authenticator, *authenticatorArgs)
+    thread.join()
+    return result
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / "sessions.qat")
+    recorder = trace.Recorder(path)
+    for seed in range(5):
+        backend = LocalBackend(LocalNetwork(timeout=5, seed=seed))
+        record(recorder, zwdz.Prover("Alice", backend), (KEY, "Bob"),
+               zwdz.Authenticator("Bob", backend), (KEY,))
+        record(recorder, pingPong.Prover("Bob", backend), (KEY, "Alice"),
+               pingPong.Authenticator("Alice", backend, 1), (KEY, "Bob"))
+        record(recorder, liBarnum.Prover("Alice", backend), ("Bob",),
+               liBarnum.Authenticator("Bob", backend), ())
+    return path
+
+
+def find(path, protocol, role):
+    for session in trace.read(path):
+        if session.protocol == protocol and session.role == role:
+            return session
+
+
+def test_round_trip(corpus):
+    assert len(list(trace.read(corpus))) == 30
+    assert find(corpus, "qAuth.nonEnt.zwdz", "Authenticator").result is True
+    assert find(corpus, "qAuth.nonEnt.pingPong", "Authenticator").options == {"threshold": 1}
+    assert trace.replayFile(corpus) == (30, [])
+
+
+def test_divergence_is_detected(corpus):
+    session = find(corpus, "qAuth.nonEnt.zwdz", "Authenticator")
+    session.args = ["1" + KEY[1:]]
+    with pytest.raises(trace.ReplayError):
+        trace.replay(session)
+
+
+def test_unknown_event_is_a_replay_error(corpus):
+    session = list(trace.read(corpus))[0]
+    session.events = bytes([200]) + session.events[1:]
+    with pytest.raises(trace.ReplayError):
+        trace.replay(session)
+
+
+def test_error_sessions_replay(tmp_path):
+    path = str(tmp_path / "errors.qat")
+    recorder = trace.Recorder(path)
+    backend = LocalBackend(LocalNetwork(timeout=0.01))
+    with pytest.raises(ValueError):
+        recorder.run(zwdz.Prover("Alice", backend), "12", "Bob")
+    with pytest.raises(TimeoutError):
+        recorder.run(zwdz.Authenticator("Bob", backend), KEY)
+
+    sessions = list(trace.read(path))
+    assert sessions[0].error.startswith("ValueError")
+    assert sessions[1].error.startswith("TimeoutError")
+    assert trace.replayFile(path) == (2, [])
+
+
+def test_bad_session_does_not_abort_corpus(corpus):
+    sessions = list(trace.read(corpus))
+    sessions[0].role = "Missing"
+    with open(corpus, "wb") as output:
+        for session in sessions:
+            output.write(session.encode())
+    count, failures = trace.replayFile(corpus)
+    assert count == 30
+    assert [index for index, error in failures] == [0]
+
+
+def test_truncated_tail_is_ignored(corpus):
+    with open(corpus, "rb") as data:
+        content = data.read()
+    with open(corpus, "wb") as output:
+        output.write(content[:-5])
+    assert len(list(trace.read(corpus))) == 29